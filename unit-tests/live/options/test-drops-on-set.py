@@ -7,15 +7,19 @@ import platform
 import pyrealsense2 as rs
 from rspy import test
 from rspy import log
+from rspy.stopwatch import Stopwatch
 import time
 
 dev = test.find_first_device_or_exit()
 depth_sensor = dev.first_depth_sensor()
 color_sensor = dev.first_color_sensor()
 product_line = dev.get_info(rs.camera_info.product_line)
+is_d400 = product_line == "D400"  # D400 depth may reset its frame counter while streaming
 
 previous_depth_frame_number = -1
 previous_color_frame_number = -1
+n_depth_frames = 0
+n_color_frames = 0
 after_set_option = False
 
 
@@ -29,29 +33,40 @@ def get_allowed_drops():
     # Our KPI is to prevent sequential frame drops, therefore single frame drop is allowed.
     return 1
 
+def wait_for_frames( n_frames = 10, timeout = 1 ):
+    """
+    Wait until both depth and color have received 'n_frames' new frames, or the timeout expired.
+    10 frames are enough to cover the sequential drops that may occur right after setting an option.
+    """
+    target_depth = n_depth_frames + n_frames
+    target_color = n_color_frames + n_frames
+    sw = Stopwatch()
+    while (n_depth_frames < target_depth or n_color_frames < target_color) and sw.get_elapsed() < timeout:
+        time.sleep(0.01)
+
+
 def set_new_value(sensor, option, value):
     global after_set_option
     after_set_option = True
     sensor.set_option(option, value)
-    time.sleep(0.5)  # collect frames
+    wait_for_frames()  # collect frames
     after_set_option = False
 
 
 def check_depth_frame_drops(frame):
-    global previous_depth_frame_number
+    global previous_depth_frame_number, n_depth_frames
     allowed_drops = get_allowed_drops()
-    is_d400 = 0
-    if product_line == "D400":
-        is_d400 = 1
     test.check_frame_drops(frame, previous_depth_frame_number, allowed_drops, is_d400)
     previous_depth_frame_number = frame.get_frame_number()
+    n_depth_frames += 1
 
 
 def check_color_frame_drops(frame):
-    global previous_color_frame_number
+    global previous_color_frame_number, n_color_frames
     allowed_drops = get_allowed_drops()
     test.check_frame_drops(frame, previous_color_frame_number, allowed_drops)
     previous_color_frame_number = frame.get_frame_number()
+    n_color_frames += 1
 
 
 # Use a profile that's common to both L500 and D400
@@ -115,6 +130,10 @@ def test_option_changes(sensor):
             new_value = range.min
             if old_value == new_value:
                 new_value = range.max
+            if old_value == new_value:
+                # single-value range: setting it would not change anything, so there's nothing to check
+                log.d(str(option), 'has only one possible value', old_value, '- skipping')
+                continue
             if not log.d(str(option), old_value, '->', new_value):
                 test.info(str(option), new_value, persistent=True)
             set_new_value(sensor, option, new_value)
@@ -7,25 +7,27 @@
 import pyrealsense2 as rs
 from rspy import test
 
-color_options = [rs.option.backlight_compensation,
-                     rs.option.brightness,
-                     rs.option.contrast,
-                     rs.option.gamma,
-                     rs.option.hue,
-                     rs.option.saturation,
-                     rs.option.sharpness,
-                     rs.option.enable_auto_white_balance,
-                     rs.option.white_balance]
+# each option and the metadata that reflects it
+color_options_metadata = ((rs.option.backlight_compensation,    rs.frame_metadata_value.backlight_compensation),
+                          (rs.option.brightness,                rs.frame_metadata_value.brightness),
+                          (rs.option.contrast,                  rs.frame_metadata_value.contrast),
+                          (rs.option.gamma,                     rs.frame_metadata_value.gamma),
+                          (rs.option.hue,                       rs.frame_metadata_value.hue),
+                          (rs.option.saturation,                rs.frame_metadata_value.saturation),
+                          (rs.option.sharpness,                 rs.frame_metadata_value.sharpness),
+                          (rs.option.enable_auto_white_balance, rs.frame_metadata_value.auto_white_balance_temperature),
+                          (rs.option.white_balance,             rs.frame_metadata_value.manual_white_balance))
 
-color_metadata = [rs.frame_metadata_value.backlight_compensation,
-                     rs.frame_metadata_value.brightness,
-                     rs.frame_metadata_value.contrast,
-                     rs.frame_metadata_value.gamma,
-                     rs.frame_metadata_value.hue,
-                     rs.frame_metadata_value.saturation,
-                     rs.frame_metadata_value.sharpness,
-                     rs.frame_metadata_value.auto_white_balance_temperature,
-                     rs.frame_metadata_value.manual_white_balance]
+def wait_for_metadata_value(metadata, value_to_set):
+    """
+    Wait for the frame metadata to reflect the value that was set, for no more than num_of_frames_to_wait frames
+    :return: the last frame received
+    """
+    for i in range(num_of_frames_to_wait):
+        lrs_frame = lrs_queue.wait_for_frame(5000)
+        if lrs_frame.supports_frame_metadata(metadata) and lrs_frame.get_frame_metadata(metadata) == value_to_set:
+            break
+    return lrs_frame
 
 def check_option_and_metadata_values(option, metadata, value_to_set, frame):
     changed = color_sensor.get_option(option)
@@ -37,62 +39,56 @@ def check_option_and_metadata_values(option, metadata, value_to_set, frame):
         print("metadata " + repr(metadata) + " not supported")
 
 #############################################################################################
-test.start("checking color options")
 # test scenario:
-# for each option, set value, wait 10 frames, check value with get_option and get_frame_metadata
+# for each option, set value, wait until the metadata shows it (up to 15 frames), check value with get_option and
+# get_frame_metadata
 # values set for each option are min, max, and default values
+# each supported option is reported as a separate test case
 ctx = rs.context()
 dev = ctx.query_devices()[0]
 
 try:
     color_sensor = dev.first_color_sensor()
-    # Using a profile common to both L500 and D400
-    color_profile = next(p for p in color_sensor.profiles if p.fps() == 30
-                         and p.stream_type() == rs.stream.color
-                         and p.format() == rs.format.yuyv
-                         and p.as_video_stream_profile().width() == 640
-                         and p.as_video_stream_profile().height() == 480)
-    color_sensor.open(color_profile)
-    lrs_queue = rs.frame_queue(capacity=10, keep_frames=False)
-    color_sensor.start(lrs_queue)
+except RuntimeError:
+    print("The device found has no color sensor")
+    test.print_results_and_exit()
+
+# Using a profile common to both L500 and D400
+color_profile = next(p for p in color_sensor.profiles if p.fps() == 30
+                     and p.stream_type() == rs.stream.color
+                     and p.format() == rs.format.yuyv
+                     and p.as_video_stream_profile().width() == 640
+                     and p.as_video_stream_profile().height() == 480)
+color_sensor.open(color_profile)
+# we only ever look at the latest frame; older ones are dropped by the queue
+lrs_queue = rs.frame_queue(capacity=1, keep_frames=False)
+color_sensor.start(lrs_queue)
 
-    iteration = 0
-    option_index = -1  # running over options
-    value_index = -1  # 0, 1, 2 for min, max, default
-    # number of frames to wait between set_option and checking metadata
-    # is set as 10 - the expected delay is ~120ms for Win and ~80-90ms for Linux
+try:
+    # maximal number of frames to wait between set_option and checking metadata
+    # the expected delay is ~120ms for Win and ~80-90ms for Linux, so we normally stop much earlier
     num_of_frames_to_wait = 15
-    while True:
+    supported_options_metadata = [(option, metadata) for option, metadata in color_options_metadata
+                                  if color_sensor.supports(option)]
+    for option, metadata in supported_options_metadata:
+        test.start("checking color option", option)
         try:
-            lrs_frame = lrs_queue.wait_for_frame(5000)
-            if iteration == 0:
-                option_index = option_index + 1
-                if option_index == len(color_options):
-                    break
-                option = color_options[option_index]
-                if not color_sensor.supports(option):
-                    continue
-                option_range = color_sensor.get_option_range(option)
-                metadata = color_metadata[option_index]
-                # the following if statement is needed because of some bug in FW - see DSO-17221
-                # to be removed after this bug is solved
-                if option == rs.option.white_balance:
-                    color_sensor.set_option(rs.option.enable_auto_white_balance, 0)
-                value_to_set = option_range.min
-            elif iteration == (num_of_frames_to_wait + 1):
-                value_to_set = option_range.max
-            elif iteration == 2 * (num_of_frames_to_wait + 1):
-                value_to_set = option_range.default
-            if iteration % (num_of_frames_to_wait + 1) == 0:  # for iterations 0, 11, 22
+            option_range = color_sensor.get_option_range(option)
+            # the following if statement is needed because of some bug in FW - see DSO-17221
+            # to be removed after this bug is solved
+            if option == rs.option.white_balance:
+                color_sensor.set_option(rs.option.enable_auto_white_balance, 0)
+            for value_to_set in (option_range.min, option_range.max, option_range.default):
                 color_sensor.set_option(option, value_to_set)
-            if (iteration + 1) % (num_of_frames_to_wait + 1) == 0:  # for iterations 10, 21, 32
+                lrs_frame = wait_for_metadata_value(metadata, value_to_set)
                 check_option_and_metadata_values(option, metadata, value_to_set, lrs_frame)
-            iteration = (iteration + 1) % (3 * (num_of_frames_to_wait + 1))
-
-        except:
+        except Exception:
             test.unexpected_exception()
-except:
-    print("The device found has no color sensor")
+        test.finish()
+finally:
+    # release the last frame before stopping; any error from stop/close is real and should fail the run
+    lrs_frame = None
+    color_sensor.stop()
+    color_sensor.close()
 
-test.finish()
 test.print_results_and_exit()
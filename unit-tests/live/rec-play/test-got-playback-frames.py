@@ -6,6 +6,7 @@
 
 import pyrealsense2 as rs, os, time, tempfile, platform, sys
 from rspy import devices, log, test
+from rspy.stopwatch import Stopwatch
 
 cp = dp = None
 color_format = depth_format = None
@@ -16,10 +17,17 @@ previous_depth_frame_number = -1
 previous_color_frame_number = -1
 got_frames_rgb = False
 got_frames_depth = False
-
+n_depth_frames = 0
+n_color_frames = 0
+# Number of frames we want from each stream when recording and playing back; at the lowest color fps this is still
+# well below the 3 seconds we used to record for
+frames_to_record = 10
+
+# The live device and its sensors are looked up once and reused by all the tests; depth_sensor and
+# color_sensor below point to either these or the playback sensors
 dev = test.find_first_device_or_exit()
-depth_sensor = dev.first_depth_sensor()
-color_sensor = dev.first_color_sensor()
+live_depth_sensor = dev.first_depth_sensor()
+live_color_sensor = dev.first_color_sensor()
 
 # The test also checks frame drops, therefore D400-specific relaxation must apply
 # The follow code is borrowed fro test-drops-on-set.py and later can be merged/refactored
@@ -31,35 +39,37 @@ if product_line == "D400":
 # Our KPI is to prevent sequential frame drops, therefore single frame drop is allowed.
 allowed_drops = 1
 
+def video_profiles_settings( sensor, stream_type ):
+    """
+    Reads the settings of all the sensor's profiles of the given stream type in a single pass over the profiles
+    :return: A list of ( is_default, format, fps, width, height ) tuples
+    """
+    settings = []
+    for p in sensor.profiles:
+        if p.stream_type() == stream_type:
+            vp = p.as_video_stream_profile()
+            settings.append(( p.is_default(), p.format(), p.fps(), vp.width(), vp.height() ))
+    return settings
+
 # finding the wanted profile settings. We want to use default settings except for color fps where we want
 # the lowest value available
-for p in color_sensor.profiles:
-    if p.is_default() and p.stream_type() == rs.stream.color:
-        color_format = p.format()
-        color_fps = p.fps()
-        color_width = p.as_video_stream_profile().width()
-        color_height = p.as_video_stream_profile().height()
-        break
-for p in color_sensor.profiles:
-    if p.stream_type() == rs.stream.color and p.format() == color_format and \
-       p.fps() < color_fps and\
-       p.as_video_stream_profile().width() == color_width and \
-       p.as_video_stream_profile().height() == color_height:
-        color_fps = p.fps()
-for p in depth_sensor.profiles:
-    if p.is_default() and p.stream_type() == rs.stream.depth:
-        depth_format = p.format()
-        depth_fps = p.fps()
-        depth_width = p.as_video_stream_profile().width()
-        depth_height = p.as_video_stream_profile().height()
-        break
+color_settings = video_profiles_settings( live_color_sensor, rs.stream.color )
+color_format, color_fps, color_width, color_height = next( ( f, fps, w, h ) for default, f, fps, w, h in color_settings
+                                                           if default )
+color_fps = min( fps for default, f, fps, w, h in color_settings
+                 if ( f, w, h ) == ( color_format, color_width, color_height ))
+depth_format, depth_fps, depth_width, depth_height = next(
+    ( f, fps, w, h ) for default, f, fps, w, h in video_profiles_settings( live_depth_sensor, rs.stream.depth )
+    if default )
 
 def color_frame_call_back( frame ):
     global previous_color_frame_number
     global is_d400
     global allowed_drops
     global got_frames_rgb
+    global n_color_frames
     got_frames_rgb = True
+    n_color_frames += 1
     test.check_frame_drops( frame, previous_color_frame_number, allowed_drops, is_d400 )
     previous_color_frame_number = frame.get_frame_number()
 
@@ -68,11 +78,30 @@ def depth_frame_call_back( frame ):
     global is_d400
     global allowed_drops
     global got_frames_depth
+    global n_depth_frames
 
     got_frames_depth = True
+    n_depth_frames += 1
     test.check_frame_drops( frame, previous_depth_frame_number, allowed_drops, is_d400 )
     previous_depth_frame_number = frame.get_frame_number()
 
+def count_color_frames( frame ):
+    global n_color_frames
+    n_color_frames += 1
+
+def count_depth_frames( frame ):
+    global n_depth_frames
+    n_depth_frames += 1
+
+def wait_for_frames( n_frames, timeout = 3 ):
+    """
+    Wait until both depth and color received at least n_frames frames since the counters were last reset,
+    or until the timeout (in seconds) expired
+    """
+    sw = Stopwatch()
+    while ( n_depth_frames < n_frames or n_color_frames < n_frames ) and sw.get_elapsed() < timeout:
+        time.sleep( 0.05 )
+
 def restart_profiles():
     """
     You can't use the same profile twice, but we need the same profile several times. So this function resets the
@@ -89,7 +118,7 @@ def restart_profiles():
 
     dp = next( p for p in depth_sensor.profiles if p.fps() == depth_fps
                and p.stream_type() == rs.stream.depth
-               and p.format() == p.format() == depth_format
+               and p.format() == depth_format
                and p.as_video_stream_profile().width() == depth_width
                and p.as_video_stream_profile().height() == depth_height )
 
@@ -117,12 +146,25 @@ def stop_sensor( sensor ):
                 test.unexpected_exception()
             sensor.close()
 
+def unload_playback():
+    try:
+        ctx.unload_device( file_name )
+    except Exception:
+        test.unexpected_exception()
+
 # create temporary folder to record to that will be deleted automatically at the end of the script
 # (requires that no files are being held open inside this directory. Important to not keep any handle open to a file
 # in this directory, any handle as such must be set to None)
-temp_dir = tempfile.TemporaryDirectory( prefix='recordings_' )
+# On Linux we prefer a RAM-backed file system (/dev/shm), if available, so disk I/O does not affect the recording
+temp_dir_parent = None
+if platform.system() == 'Linux' and os.access( '/dev/shm', os.W_OK ):
+    temp_dir_parent = '/dev/shm'
+temp_dir = tempfile.TemporaryDirectory( prefix='recordings_', dir=temp_dir_parent )
 file_name = temp_dir.name + os.sep + 'rec.bag'
 
+# a single context is used to load all playback devices; each test unloads the file when it's done with it
+ctx = rs.context()
+
 ################################################################################################
 test.start("Trying to record and playback using pipeline interface")
 
@@ -133,7 +175,8 @@ try:
     cfg = rs.config()
     cfg.enable_record_to_file( file_name )
     pipeline.start( cfg )
-    time.sleep(3)
+    for i in range( frames_to_record ):
+        pipeline.wait_for_frames()
     pipeline.stop()
     # we create a new pipeline and use it to playback from the file we just recoded to
     pipeline = rs.pipeline()
@@ -155,19 +198,19 @@ test.start("Trying to record and playback using sensor interface")
 
 recorder = depth_sensor = color_sensor = playback = None
 try:
-    dev = test.find_first_device_or_exit()
     recorder = rs.recorder( file_name, dev )
-    depth_sensor = dev.first_depth_sensor()
-    color_sensor = dev.first_color_sensor()
+    depth_sensor = live_depth_sensor
+    color_sensor = live_color_sensor
 
     restart_profiles()
 
+    n_depth_frames = n_color_frames = 0
     depth_sensor.open( dp )
-    depth_sensor.start( lambda f: None )
+    depth_sensor.start( count_depth_frames )
     color_sensor.open( cp )
-    color_sensor.start( lambda f: None )
+    color_sensor.start( count_color_frames )
 
-    time.sleep(3)
+    wait_for_frames( frames_to_record )
 
     recorder.pause()
     recorder = None
@@ -176,7 +219,6 @@ try:
     depth_sensor.stop()
     depth_sensor.close()
 
-    ctx = rs.context()
     playback = ctx.load_device( file_name )
 
     depth_sensor = playback.first_depth_sensor()
@@ -184,12 +226,14 @@ try:
 
     restart_profiles()
 
+    n_depth_frames = n_color_frames = 0
     depth_sensor.open( dp )
     depth_sensor.start( depth_frame_call_back )
     color_sensor.open( cp )
     color_sensor.start( color_frame_call_back )
 
-    time.sleep(3)
+    # play back the recorded frames so the callbacks can check them for drops
+    wait_for_frames( frames_to_record )
 
     # if record and playback worked we will receive frames, the callback functions will be called and got-frames
     # will be True. If the record and playback failed it will be false
@@ -206,6 +250,7 @@ finally: # we must remove all references to the file so we can use it again in t
         recorder = None
     if playback:
         playback = None
+        unload_playback()
 
 test.finish()
 
@@ -214,10 +259,9 @@ test.start("Trying to record and playback using sensor interface with syncer")
 
 try:
     sync = rs.syncer()
-    dev = test.find_first_device_or_exit()
     recorder = rs.recorder( file_name, dev )
-    depth_sensor = dev.first_depth_sensor()
-    color_sensor = dev.first_color_sensor()
+    depth_sensor = live_depth_sensor
+    color_sensor = live_color_sensor
 
     restart_profiles()
 
@@ -226,7 +270,15 @@ try:
     color_sensor.open( cp )
     color_sensor.start( sync )
 
-    time.sleep(3)
+    # the streams run at different fps, so count each one separately until both were recorded enough
+    n_depth_frames = n_color_frames = 0
+    sw = Stopwatch()
+    while ( n_depth_frames < frames_to_record or n_color_frames < frames_to_record ) and sw.get_elapsed() < 3:
+        fs = sync.wait_for_frames()
+        if fs.first_or_default( rs.stream.depth ):
+            n_depth_frames += 1
+        if fs.first_or_default( rs.stream.color ):
+            n_color_frames += 1
 
     recorder.pause()
     recorder = None
@@ -235,7 +287,6 @@ try:
     depth_sensor.stop()
     depth_sensor.close()
 
-    ctx = rs.context()
     playback = ctx.load_device( file_name )
 
     depth_sensor = playback.first_depth_sensor()
@@ -261,6 +312,7 @@ finally: # we must remove all references to the file so the temporary folder can
         recorder = None
     if playback:
         playback = None
+        unload_playback()
 
 test.finish()
 
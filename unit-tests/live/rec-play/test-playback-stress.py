@@ -4,9 +4,8 @@
 #test:timeout 1500
 #test:donotrun:!nightly
 
-import pyrealsense2 as rs, os, time
+import pyrealsense2 as rs, os, threading, contextlib
 from rspy import log, test, repo
-from rspy.timer import Timer
 
 file_name = os.path.join( repo.build, 'unit-tests', 'recordings', 'all_combinations_depth_color.bag' )
 log.d( 'deadlock file:', file_name )
@@ -19,59 +18,78 @@ def frame_callback( f ):
     frames_count += 1
 
 
+class PlaybackStatusVerifier:
+    """
+    Follows the status of a playback device through its status-changed callback, so we can wait for a
+    specific status instead of polling current_status()
+    """
+    def __init__( self ):
+        self._events = { rs.playback_status.playing : threading.Event(),
+                         rs.playback_status.stopped : threading.Event() }
+
+    def reset( self, playback ):
+        """
+        Forget any status seen so far and start following a (possibly new) playback device
+        :param playback: The playback device whose status to follow
+        """
+        for event in self._events.values():
+            event.clear()
+        playback.set_status_changed_callback( self._on_status_changed )
+
+    def _on_status_changed( self, status ):
+        log.d( "status =", status )
+        event = self._events.get( status )
+        if event:
+            event.set()
+
+    def wait_for_status( self, status, timeout ):
+        """
+        :param status: The playback status to wait for; either playing or stopped
+        :param timeout: Number of seconds of maximum wait time
+        :return: True if the status was reported before the timeout
+        """
+        return self._events[status].wait( timeout )
+
+
 ################################################################################################
 test.start( "Playback stress test" )
 
 log.d( "Playing back: " + file_name )
-wait_for_stop_timer = Timer(10)
+status_verifier = PlaybackStatusVerifier()
+ctx = rs.context()
 for i in range(250):
+    dev = None
     try:
         log.d("Starting iteration # " , i)
-        ctx = rs.context()
         dev = ctx.load_device( file_name )
         dev.set_real_time( False )
         sensors = dev.query_sensors()
         frames_count = 0
-        for sensor in sensors:
-            sensor.open( sensor.get_stream_profiles() )
-            
-        for sensor in sensors:
-            sensor.start( frame_callback )
-    
-        while( True ):
-            if dev.current_status() != rs.playback_status.playing:
-                time.sleep(0.05)
-                continue
-            else:
-                break
-        
-        test.check_equal( dev.current_status(), rs.playback_status.playing )
-        
-        wait_for_stop_timer.start()
-        
-        # We allow 10 seconds to each iteration to verify the playback_stopped event.
-        while( not wait_for_stop_timer.has_expired() ):
-        
-            status = dev.current_status()
-            
-            if status == rs.playback_status.stopped:
-                log.d( 'stopped!' )
-                break
-            else:
-                log.d( "status =", status )
-                
-            time.sleep( 1 )
-            
-        test.check(not wait_for_stop_timer.has_expired())
-        
-        for sensor in sensors:
-            sensor.stop()
-            sensor.close()
+        status_verifier.reset( dev )
+        # Whatever happens, stop every started sensor and then close every opened one (LIFO)
+        with contextlib.ExitStack() as teardown:
+            for sensor in sensors:
+                sensor.open( sensor.get_stream_profiles() )
+                teardown.callback( sensor.close )
+
+            for sensor in sensors:
+                sensor.start( frame_callback )
+                teardown.callback( sensor.stop )
+
+            test.check( status_verifier.wait_for_status( rs.playback_status.playing, 10 ))
+
+            # We allow 10 seconds to each iteration to verify the playback_stopped event.
+            test.check( status_verifier.wait_for_status( rs.playback_status.stopped, 10 ))
     except Exception:
         test.unexpected_exception()
     finally:
         test.check_equal(frames_count, frames_in_bag_file)
-        dev = None
+        if dev is not None:
+            sensors = dev = None
+            try:
+                ctx.unload_device( file_name )
+            except Exception:
+                test.unexpected_exception()
 test.finish()
 #############################################################################################
 
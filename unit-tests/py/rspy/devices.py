@@ -54,10 +54,11 @@ except ModuleNotFoundError:
     rs = None
     acroname = None
 
-import time
+import time, threading
 
 _device_by_sn = dict()
 _context = None
+_device_change_event = threading.Event()  # set by _device_change_callback
 
 
 class Device:
@@ -263,6 +264,18 @@ def _device_change_callback( info ):
             # shouldn't see new devices...
             log.d( 'new device detected!?' )
             _device_by_sn[sn] = Device( sn, handle )
+    _device_change_event.set()
+
+
+def _wait_for_device_change( timeout ):
+    """
+    Wait for the next device-change notification (see query()), but no more than the given timeout.
+    Without monitoring of changes this is equivalent to sleeping for the full timeout.
+
+    :param timeout: Number of seconds of maximum wait time
+    """
+    _device_change_event.wait( timeout )
+    _device_change_event.clear()
 
 
 def all():
@@ -487,6 +500,7 @@ def _wait_until_removed( serial_numbers, timeout = 5 ):
     :param timeout: Number of seconds of maximum wait time
     :return: True if all have come offline; False if timeout was reached
     """
+    deadline = time.time() + timeout
     while True:
         have_devices = False
         enabled_sns = enabled()
@@ -497,10 +511,10 @@ def _wait_until_removed( serial_numbers, timeout = 5 ):
         if not have_devices:
             return True
         #
-        if timeout <= 0:
+        remaining = deadline - time.time()
+        if remaining <= 0:
             return False
-        timeout -= 1
-        time.sleep( 1 )
+        _wait_for_device_change( min( 1, remaining ))
 
 
 def _wait_for( serial_numbers, timeout = 5 ):
@@ -512,6 +526,7 @@ def _wait_for( serial_numbers, timeout = 5 ):
     :return: True if all have come online; False if timeout was reached
     """
     did_some_waiting = False
+    deadline = time.time() + timeout
     while True:
         #
         have_all_devices = True
@@ -528,12 +543,12 @@ def _wait_for( serial_numbers, timeout = 5 ):
                 time.sleep( 1 )
             return True
         #
-        if timeout <= 0:
+        remaining = deadline - time.time()
+        if remaining <= 0:
             if did_some_waiting:
                 log.d( 'timed out' )
             return False
-        timeout -= 1
-        time.sleep( 1 )
+        _wait_for_device_change( min( 1, remaining ))
         did_some_waiting = True
 
 
@@ -549,6 +564,7 @@ def hw_reset( serial_numbers, timeout = 5 ):
     :param timeout: Maximum # of seconds to wait for the devices to come back online
     :return: True if all devices have come back online before timeout
     """
+    _device_change_event.clear()
     for sn in serial_numbers:
         dev = get( sn ).handle
         dev.hardware_reset()
@@ -11,8 +11,10 @@ void init_record_playback(py::module &m) {
     py::class_<rs2::playback, rs2::device> playback(m, "playback"); // No docstring in C++
     playback.def(py::init<rs2::device>(), "device"_a)
         .def("pause", &rs2::playback::pause, "Pauses the playback. Calling pause() in \"Paused\" status does nothing. If "
-             "pause() is called while playback status is \"Playing\" or \"Stopped\", the playback will not play until resume() is called.")
-        .def("resume", &rs2::playback::resume, "Un-pauses the playback. Calling resume() while playback status is \"Playing\" or \"Stopped\" does nothing.")
+             "pause() is called while playback status is \"Playing\" or \"Stopped\", the playback will not play until resume() is called.",
+             py::call_guard<py::gil_scoped_release>())
+        .def("resume", &rs2::playback::resume, "Un-pauses the playback. Calling resume() while playback status is \"Playing\" or \"Stopped\" does nothing.",
+             py::call_guard<py::gil_scoped_release>())
         .def("file_name", &rs2::playback::file_name, "The name of the playback file.")
         .def("get_position", &rs2::playback::get_position, "Retrieves the current position of the playback in the file in terms of time. Units are expressed in nanoseconds.")
         .def("get_duration", &rs2::playback::get_duration, "Retrieves the total duration of the file.")
@@ -33,8 +35,8 @@ void init_record_playback(py::module &m) {
     py::class_<rs2::recorder, rs2::device> recorder(m, "recorder", "Records the given device and saves it to the given file as rosbag format.");
     recorder.def(py::init<const std::string&, rs2::device>())
         .def(py::init<const std::string&, rs2::device, bool>())
-        .def("pause", &rs2::recorder::pause, "Pause the recording device without stopping the actual device from streaming.")
-        .def("resume", &rs2::recorder::resume, "Unpauses the recording device, making it resume recording.");
+        .def("pause", &rs2::recorder::pause, "Pause the recording device without stopping the actual device from streaming.", py::call_guard<py::gil_scoped_release>())
+        .def("resume", &rs2::recorder::resume, "Unpauses the recording device, making it resume recording.", py::call_guard<py::gil_scoped_release>());
     // filename?
     /** end rs_record_playback.hpp **/
 }